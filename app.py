@@ -1,31 +1,180 @@
 import os
+import re
+import sys
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from flask import Flask, redirect, request, session, url_for, render_template, jsonify
+from urllib.parse import urlencode
+from flask import Flask, Response, redirect, request, session, url_for, render_template, jsonify
 from dotenv import load_dotenv
+from flask.json.provider import JSONProvider
 from flask_cors import CORS, cross_origin
-import json
+from flask_compress import Compress
+from cachetools import TTLCache
+import logging
+import orjson
 import uuid
+import functools
+import threading
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+load_dotenv()
+
+# LOG_LEVEL takes a level name (case-insensitive, e.g. "warn") or a number
+LOG_LEVEL = (os.getenv("LOG_LEVEL") or "INFO").strip().upper()
+log_level = int(LOG_LEVEL) if LOG_LEVEL.isdigit() else logging.getLevelName(LOG_LEVEL)
+logging.basicConfig(level=log_level if isinstance(log_level, int) else logging.INFO)
+logger = logging.getLogger(__name__)
+if not isinstance(log_level, int):
+    logger.warning("⚠️ Unknown LOG_LEVEL %r, using INFO", LOG_LEVEL)
 
 session_id = str(uuid.uuid4())
-print(session_id)
+logger.info("Session ID: %s", session_id)
 
-DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
 
-load_dotenv()
+class OrjsonProvider(JSONProvider):
+    """Serve jsonify() (and the session cookie) through orjson's C encoder."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+@dataclass(slots=True)
+class DiscordUser:
+    """The fields of a Discord /users/@me payload the login flow relies on."""
+
+    id: str
+    username: str
+    discriminator: str = "0000"
+    avatar: str | None = None
+    locale: str = "Unknown"
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            id=data["id"],
+            username=data["username"],
+            discriminator=data.get("discriminator", "0000"),
+            avatar=data.get("avatar"),
+            locale=data.get("locale", "Unknown"),
+        )
 
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+# Compress JSON and HTML responses (zstd, then brotli, gzip or deflate). Streamed
+# responses such as GET /api/chatlogs are compressed on the fly with zstd, brotli
+# or deflate only; gzip is never used for them.
+Compress(app)
 CORS(app, resources={r"/api/*": {"origins": "https://bloxpanel-dev.netlify.app"}}, supports_credentials=True)
 app.secret_key = os.getenv("SECRET_KEY")
+DEBUG = os.getenv("FLASK_DEBUG") == "1"
 
 DISCORD_CLIENT_ID = os.getenv("DISCORD_CLIENT_ID")
 DISCORD_CLIENT_SECRET = os.getenv("DISCORD_CLIENT_SECRET")
 DISCORD_REDIRECT_URI = os.getenv("DISCORD_REDIRECT_URI")
+DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL")
+if not DISCORD_WEBHOOK_URL:
+    logger.warning("DISCORD_WEBHOOK_URL is not set; login webhook logs are disabled")
 API_BASE_URL = "https://discord.com/api"
-CHATLOG_FILE = "chatlogs.json"
-
-
+CHATLOG_FILE = "chatlogs.json"  # legacy store, imported into CHATLOG_DB once
+CHATLOG_DB = "chatlogs.db"
+CHATLOG_REQUIRED_FIELDS = frozenset(("username", "message", "timestamp"))
+ALLOWED_USERS_FILE = "allowed_users.json"
+REQUEST_TIMEOUT = (3, 10)  # (connect, read) seconds for upstream calls
+UTC = timezone.utc
+FROMISOFORMAT_ACCEPTS_Z = sys.version_info >= (3, 11)
+
+# OAuth pieces that only depend on config, built once instead of per request
+DISCORD_LOGIN_URL = f"{API_BASE_URL}/oauth2/authorize?" + urlencode({
+    "client_id": DISCORD_CLIENT_ID,
+    "redirect_uri": DISCORD_REDIRECT_URI,
+    "response_type": "code",
+    "scope": "identify",
+})
+DISCORD_TOKEN_URL = f"{API_BASE_URL}/oauth2/token"
+DISCORD_USER_URL = f"{API_BASE_URL}/users/@me"
+DISCORD_TOKEN_DATA = {
+    "client_id": DISCORD_CLIENT_ID,
+    "client_secret": DISCORD_CLIENT_SECRET,
+    "grant_type": "authorization_code",
+    "redirect_uri": DISCORD_REDIRECT_URI,
+    "scope": "identify",
+}
+DISCORD_TOKEN_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+DISCORD_AVATAR_URL = "https://cdn.discordapp.com/avatars/{}/{}.png".format
+# Parts of the login webhook embed that are the same for every user
+LOGIN_EMBED_TEMPLATE = {"title": "🔐 New Login", "color": 0x3498db}
+
+# Roblox endpoints; the per-user ones are bound str.format templates
+ROBLOX_USERNAMES_URL = "https://users.roblox.com/v1/usernames/users"
+ROBLOX_PROFILE_URL = "https://users.roblox.com/v1/users/{}".format
+ROBLOX_FRIENDS_COUNT_URL = "https://friends.roblox.com/v1/users/{}/friends/count".format
+ROBLOX_AVATAR_URL = (
+    "https://thumbnails.roblox.com/v1/users/avatar?userIds={}&size=420x420&format=Png&isCircular=false".format
+)
+ROBLOX_THUMBNAIL_BATCH_URL = "https://thumbnails.roblox.com/v1/batch"
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+UPSTREAM_WORKERS = 32  # fan-out threads for concurrent upstream calls
+WEBHOOK_WORKERS = 4  # background threads for the login webhook
+REQUEST_THREADS = 16  # gunicorn --threads, see procfile
+
+
+def make_session(pool_connections, pool_maxsize):
+    """Build a pooled session that keeps upstream connections (TCP + TLS) alive."""
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        # Read timeouts aren't retried: that would multiply the worst-case wait,
+        # and read=False lets them surface as requests' Timeout.
+        max_retries=Retry(total=2, read=False, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+    ))
+    return session
+
+
+# One pooled session per upstream service, each sized for its own traffic.
+# A host's pool holds enough connections for everything that can be in flight
+# at once; anything beyond pool_maxsize would be closed after use and cost a
+# fresh handshake next time.
+# Discord is hit by request threads (OAuth) and webhook workers.
+DISCORD_SESSION = make_session(pool_connections=2, pool_maxsize=REQUEST_THREADS + WEBHOOK_WORKERS)
+# Roblox (users/friends/thumbnails) is hit by request threads and fan-out workers.
+ROBLOX_SESSION = make_session(pool_connections=8, pool_maxsize=UPSTREAM_WORKERS + REQUEST_THREADS)
+
+# Worker threads for firing independent upstream calls concurrently
+HTTP_EXECUTOR = ThreadPoolExecutor(max_workers=UPSTREAM_WORKERS, thread_name_prefix="upstream")
+
+# Fire-and-forget login webhooks, so /callback doesn't wait on Discord; webhooks still
+# queued at exit are sent before the interpreter stops
+LOG_EXECUTOR = ThreadPoolExecutor(max_workers=WEBHOOK_WORKERS, thread_name_prefix="webhook")
+
+# Recently fetched Roblox lookups, keyed by (lookup kind, lowercased username / user ID)
+ROBLOX_USER_CACHE = TTLCache(maxsize=4096, ttl=120)
+ROBLOX_USER_CACHE_LOCK = threading.Lock()
+# Anything that can't be a user ID or a Roblox username (3-20 letters, digits
+# or underscores) is rejected before spending upstream calls on it
+ROBLOX_INPUT_RE = re.compile(r"[0-9]{1,19}|[A-Za-z0-9_]{3,20}")
+
+
+class InvalidRobloxInput(ValueError):
+    """Raised for input that can't be a Roblox user ID or username."""
+
+
+# Rendered thumbnail URLs, keyed by (user ID, thumbnail kind). Avatars change
+# far less often than profile data, so these outlive ROBLOX_USER_CACHE entries.
+ROBLOX_THUMBNAIL_CACHE = TTLCache(maxsize=8192, ttl=900)
+ROBLOX_THUMBNAIL_CACHE_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=8192)
 def parse_roblox_date(date_str):
     """
     Parse Roblox ISO8601 date string (e.g. 2020-01-01T00:00:00.000Z) into
@@ -33,26 +182,161 @@ def parse_roblox_date(date_str):
     """
     if not date_str:
         return None
+    # Roblox sends YYYY-MM-DDTHH:MM:SSZ with an optional 1-6 digit fraction
+    # (trailing zeros trimmed, e.g. .3Z), which can be sliced straight into a
+    # datetime. Pre-3.11 fromisoformat rejects fractions that aren't 3 or 6 digits.
+    size = len(date_str)
+    if (
+        20 <= size <= 27 and size != 21 and date_str[-1] == "Z"
+        and date_str[4] == "-" and date_str[10] == "T" and (size == 20 or date_str[19] == ".")
+    ):
+        try:
+            return datetime(
+                int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10]),
+                int(date_str[11:13]), int(date_str[14:16]), int(date_str[17:19]),
+                int(date_str[20:-1].ljust(6, "0")) if size > 20 else 0, tzinfo=UTC,
+            )
+        except ValueError:
+            pass
+    # Python 3.11+ fromisoformat accepts the Z suffix natively
+    if not FROMISOFORMAT_ACCEPTS_Z and date_str.endswith("Z"):
+        date_str = date_str[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(date_str)
+    except ValueError:
+        return None
+
+
+_allowed_users = {"mtime": None, "ids": frozenset()}
+_allowed_users_lock = threading.Lock()
+
+
+def allowed_users():
+    """Return the whitelisted Discord IDs, re-reading the file only when it changes."""
+    mtime = os.stat(ALLOWED_USERS_FILE).st_mtime
+    if mtime != _allowed_users["mtime"]:
+        with _allowed_users_lock:
+            if mtime != _allowed_users["mtime"]:
+                with open(ALLOWED_USERS_FILE, "rb") as f:
+                    _allowed_users["ids"] = frozenset(orjson.loads(f.read()).get("allowedUsers", []))
+                _allowed_users["mtime"] = mtime
+    return _allowed_users["ids"]
+
+
+_chatlog_local = threading.local()
+
+
+def get_chatlog_db():
+    """Return this thread's SQLite connection, opening it on first use."""
+    conn = getattr(_chatlog_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(CHATLOG_DB, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _chatlog_local.conn = conn
+    return conn
+
+
+def init_chatlog_db():
+    conn = get_chatlog_db()
+    conn.execute("BEGIN IMMEDIATE")
     try:
-        # Try parsing with strptime and adding timezone info manually
-        dt_naive = datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%S.%fZ")
-        return dt_naive.replace(tzinfo=timezone.utc)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chatlogs (
+                id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                username_lc TEXT NOT NULL,
+                user_id,
+                message,
+                timestamp,
+                session_id TEXT
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_chatlogs_username_lc ON chatlogs (username_lc)")
+
+        # Version 1 stores every client-supplied value as JSON text, so dicts,
+        # lists and bools round-trip; re-encode rows written before that
+        if conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            conn.execute(
+                "UPDATE chatlogs SET username = json_quote(username), user_id = json_quote(user_id), "
+                "message = json_quote(message), timestamp = json_quote(timestamp)"
+            )
+            conn.execute("PRAGMA user_version = 1")
+
+        # Carry over anything still sitting in the old JSON file
+        empty = conn.execute("SELECT 1 FROM chatlogs LIMIT 1").fetchone() is None
+        if empty and os.path.exists(CHATLOG_FILE) and os.path.getsize(CHATLOG_FILE):
+            with open(CHATLOG_FILE, "rb") as f:
+                logs = orjson.loads(f.read())
+            conn.executemany(
+                "INSERT INTO chatlogs (username, username_lc, user_id, message, timestamp, session_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    chatlog_row(
+                        log.get("username", ""),
+                        log.get("userId"),
+                        log.get("message"),
+                        log.get("timestamp"),
+                        log.get("session_id"),
+                    )
+                    for log in logs
+                ],
+            )
+        conn.execute("COMMIT")
     except Exception:
-        try:
-            # fallback to fromisoformat with replacement
-            return datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-        except Exception:
-            return None
-        
-def load_chatlogs():
-    if not os.path.exists(CHATLOG_FILE):
-        return []
-    with open(CHATLOG_FILE, "r") as f:
-        return json.load(f)
-
-def save_chatlogs(logs):
-    with open(CHATLOG_FILE, "w") as f:
-        json.dump(logs, f, indent=2)
+        conn.execute("ROLLBACK")
+        raise
+
+
+def chatlog_row(username, user_id, message, timestamp, session_id):
+    """Build INSERT parameters; the values can be any JSON, so store them as JSON text."""
+    return (
+        orjson.dumps(username).decode(),
+        str(username).lower(),
+        orjson.dumps(user_id).decode(),
+        orjson.dumps(message).decode(),
+        orjson.dumps(timestamp).decode(),
+        session_id if session_id is None else str(session_id),
+    )
+
+
+def chatlog_to_dict(row):
+    return {
+        "username": orjson.loads(row["username"]),
+        "userId": orjson.loads(row["user_id"]),
+        "message": orjson.loads(row["message"]),
+        "timestamp": orjson.loads(row["timestamp"]),
+        "session_id": row["session_id"],
+    }
+
+
+def iter_chatlogs_json(rows, batch_size=500):
+    """Yield a JSON array of chat logs from a cursor, a batch of rows at a time."""
+    yield b"["
+    separator = b""
+    while batch := rows.fetchmany(batch_size):
+        yield separator + b",".join(orjson.dumps(chatlog_to_dict(row)) for row in batch)
+        separator = b","
+    yield b"]"
+
+
+init_chatlog_db()
+
+
+@app.errorhandler(InvalidRobloxInput)
+def invalid_roblox_input(e):
+    # For the JSON endpoints (/roblox, /api/player); 400 so clients can tell it from a real miss
+    return jsonify({"error": "Invalid Roblox username or ID"}), 400
+
+
+@app.errorhandler(requests.exceptions.Timeout)
+def upstream_timeout(e):
+    # For the JSON endpoints (/roblox, /api/player); HTML pages handle their own
+    logger.warning("⏱️ Upstream request timed out: %s", e)
+    return jsonify({"error": "Upstream request timed out"}), 504
 
 
 @app.route("/")
@@ -84,85 +368,80 @@ def api_player():
 
 @app.route("/login")
 def login():
-    discord_login_url = (
-        f"{API_BASE_URL}/oauth2/authorize?client_id={DISCORD_CLIENT_ID}"
-        f"&redirect_uri={DISCORD_REDIRECT_URI}&response_type=code&scope=identify"
-    )
-    return redirect(discord_login_url)
+    return redirect(DISCORD_LOGIN_URL)
 
 
 @app.route("/callback")
 def callback():
     code = request.args.get("code")
-    print("🔁 /callback route hit")
+    logger.debug("🔁 /callback route hit")
 
     if not code:
-        print("❌ No code received from Discord.")
+        logger.warning("❌ No code received from Discord.")
         return "Missing code", 400
 
-    print("🔑 Authorization code received:", code)
+    logger.debug("🔑 Authorization code received: %s", code)
 
     # Exchange code for token
-    data = {
-        "client_id": DISCORD_CLIENT_ID,
-        "client_secret": DISCORD_CLIENT_SECRET,
-        "grant_type": "authorization_code",
-        "code": code,
-        "redirect_uri": DISCORD_REDIRECT_URI,
-        "scope": "identify",
-    }
+    data = {**DISCORD_TOKEN_DATA, "code": code}
 
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
     try:
-        token_res = requests.post(f"{API_BASE_URL}/oauth2/token", data=data, headers=headers)
+        token_res = DISCORD_SESSION.post(
+            DISCORD_TOKEN_URL, data=data, headers=DISCORD_TOKEN_HEADERS, timeout=REQUEST_TIMEOUT
+        )
         token_res.raise_for_status()
         token_json = token_res.json()
         access_token = token_json.get("access_token")
-        print("✅ Access token retrieved:", access_token)
+        logger.debug("✅ Access token retrieved: %s", access_token)
+    except requests.exceptions.Timeout:
+        logger.warning("⏱️ Discord token exchange timed out")
+        return "Discord timed out", 504
     except Exception as e:
-        print("❌ Failed to exchange token:", str(e))
+        logger.warning("❌ Failed to exchange token: %s", e)
         return "Token exchange failed", 400
 
     if not access_token:
-        print("❌ Access token missing in token response.")
+        logger.warning("❌ Access token missing in token response.")
         return "Failed to get access token", 400
 
     # Fetch user info
     try:
-        user_res = requests.get(
-            f"{API_BASE_URL}/users/@me",
-            headers={"Authorization": f"Bearer {access_token}"}
+        user_res = DISCORD_SESSION.get(
+            DISCORD_USER_URL,
+            headers={"Authorization": f"Bearer {access_token}"},
+            timeout=REQUEST_TIMEOUT,
         )
         user_res.raise_for_status()
         user = user_res.json()
-        print("👤 Discord user info fetched:", user)
+        discord_user = DiscordUser.from_json(user)
+        logger.debug("👤 Discord user info fetched: %s", user)
+    except requests.exceptions.Timeout:
+        logger.warning("⏱️ Discord user info request timed out")
+        return "Discord timed out", 504
     except Exception as e:
-        print("❌ Failed to fetch user info:", str(e))
+        logger.warning("❌ Failed to fetch user info: %s", e)
         return "Failed to fetch user info", 400
 
     session["user"] = user
-    user_id = user.get("id")
+    user_id = discord_user.id
 
     # 🔒 Check if user is allowed
     try:
-        with open("allowed_users.json", "r") as f:
-            allowed_users = json.load(f).get("allowedUsers", [])
-
-        if user_id not in allowed_users:
-            print(f"🚫 Access denied for user ID: {user_id}")
+        if user_id not in allowed_users():
+            logger.info("🚫 Access denied for user ID: %s", user_id)
             return redirect("/callback/access-denied")
 
     except Exception as e:
-        print("❌ Error reading whitelist:", str(e))
+        logger.error("❌ Error reading whitelist: %s", e)
         return "Server error", 500
 
-    # Optional: Send login webhook log
-    try:
-        send_login_log(user)
-        print("📨 Webhook log sent successfully.")
-    except Exception as e:
-        print("❌ Failed to send webhook:", str(e))
-
+    # Optional: Send login webhook log in the background, off the redirect path
+    if DISCORD_WEBHOOK_URL:
+        try:
+            LOG_EXECUTOR.submit(send_login_log, discord_user)
+            logger.debug("📨 Webhook log queued.")
+        except Exception as e:
+            logger.warning("❌ Failed to queue webhook: %s", e)
 
     # Add token to frontend URL
     return redirect(f"https://bloxpanel-dev.netlify.app/?token={access_token}")
@@ -173,29 +452,30 @@ def access_denied():
 
 def send_login_log(user):
     try:
-        username = f"{user['username']}#{user.get('discriminator', '0000')}"
-        user_id = user['id']
-        avatar_url = f"https://cdn.discordapp.com/avatars/{user_id}/{user['avatar']}.png"
+        username = f"{user.username}#{user.discriminator}"
+        user_id = user.id
+        avatar_url = DISCORD_AVATAR_URL(user_id, user.avatar)
 
         embed = {
-            "title": "🔐 New Login",
+            **LOGIN_EMBED_TEMPLATE,
             "description": f"**{username}** just logged into the dashboard.",
-            "color": 0x3498db,
             "thumbnail": {"url": avatar_url},
             "fields": [
                 {"name": "User ID", "value": user_id, "inline": True},
-                {"name": "Locale", "value": user.get("locale", 'Unknown'), "inline": True}
+                {"name": "Locale", "value": user.locale, "inline": True}
             ]
         }
 
-        payload = {"embeds": [embed]}
-        headers = {"Content-Type": "application/json"}
-
-        response = requests.post(DISCORD_WEBHOOK_URL, headers=headers, data=json.dumps(payload))
+        response = DISCORD_SESSION.post(
+            DISCORD_WEBHOOK_URL,
+            data=orjson.dumps({"embeds": [embed]}),
+            headers=JSON_HEADERS,
+            timeout=REQUEST_TIMEOUT,
+        )
         response.raise_for_status()
-        print("✅ Webhook POST status:", response.status_code)
+        logger.debug("✅ Webhook POST status: %s", response.status_code)
     except Exception as e:
-        print("❌ Exception in send_login_log():", str(e))
+        logger.warning("❌ Exception in send_login_log(): %s", e)
 
 
 
@@ -212,69 +492,11 @@ def roblox_lookup():
         if not username:
             return jsonify({"error": "Username is required"}), 400
 
-        # Step 1: Get user ID
-        res = requests.post(
-            "https://users.roblox.com/v1/usernames/users",
-            json={"usernames": [username]},
-            headers={"Content-Type": "application/json"},
-        )
-
-        if res.status_code != 200 or not res.json().get("data"):
+        lookup_data = get_roblox_lookup_data(username)
+        if not lookup_data:
             return jsonify({"error": "User not found"}), 404
 
-        user = res.json()["data"][0]
-        user_id = user["id"]
-
-        # Step 2: Get account info
-        acc_info = requests.get(f"https://users.roblox.com/v1/users/{user_id}").json()
-        created_at = acc_info.get("created")
-
-        # Calculate account age safely
-        created_date = parse_roblox_date(created_at)
-        now = datetime.now(timezone.utc)
-        if created_date is None:
-            account_age_days = "N/A"
-        else:
-            account_age_days = (now - created_date).days
-
-        # Step 3: Get friends count
-        friends_data = requests.get(
-            f"https://friends.roblox.com/v1/users/{user_id}/friends/count"
-        ).json()
-        friends_count = friends_data.get("count", "N/A")
-
-        # Step 4: Get avatar image URLs
-        avatar_url = None
-        avatar_bust_url = None
-
-        thumb_headshot = requests.get(
-            f"https://thumbnails.roblox.com/v1/users/avatar-headshot?userIds={user_id}&size=150x150&format=Png&isCircular=true"
-        ).json()
-
-        thumb_bust = requests.get(
-            f"https://thumbnails.roblox.com/v1/users/avatar-bust?userIds={user_id}&size=420x420&format=Png"
-        ).json()
-
-        if thumb_headshot.get("data"):
-            avatar_url = thumb_headshot["data"][0].get("imageUrl")
-
-        if thumb_bust.get("data"):
-            avatar_bust_url = thumb_bust["data"][0].get("imageUrl")
-
-        return jsonify(
-            {
-                "name": user["name"],
-                "accountAge": account_age_days,
-                "friends": friends_count,
-                "followers": "N/A",  # Add logic if needed
-                "following": "N/A",  # Add logic if needed
-                "voiceChat": "Not Eligible",  # Add voiceChat API if needed
-                "safeChat": "Disabled",  # Add logic if needed
-                "language": "en-us",
-                "avatarUrl": avatar_url,
-                "avatarBustUrl": avatar_bust_url,
-            }
-        )
+        return jsonify(lookup_data)
 
     return render_template("roblox.html")
 
@@ -285,50 +507,116 @@ def discord_info():
 
 
 def get_roblox_user_data(input_value):
+    return cached_roblox_call("profile", input_value, fetch_roblox_user_data)
+
+
+def get_roblox_lookup_data(username):
+    return cached_roblox_call("lookup", username, fetch_roblox_lookup_data)
+
+
+def cached_roblox_call(kind, input_value, fetch):
+    """Serve a Roblox lookup from ROBLOX_USER_CACHE, calling fetch on a miss.
+
+    fetch returns (data, complete); data built from a failed or throttled
+    sub-request is returned as-is but not cached, so the next lookup retries it.
+    """
+    input_value = input_value.strip()
+    if not ROBLOX_INPUT_RE.fullmatch(input_value):
+        raise InvalidRobloxInput(input_value)
+
+    key = (kind, input_value.lower())
+    with ROBLOX_USER_CACHE_LOCK:
+        cached = ROBLOX_USER_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    data, complete = fetch(input_value)
+    if data and complete:
+        with ROBLOX_USER_CACHE_LOCK:
+            ROBLOX_USER_CACHE[key] = data
+    return data
+
+
+def cached_thumbnails(user_id, kinds):
+    """Return {kind: image URL or None} for the thumbnails already cached for a user."""
+    with ROBLOX_THUMBNAIL_CACHE_LOCK:
+        return {kind: ROBLOX_THUMBNAIL_CACHE.get((user_id, kind)) for kind in kinds}
+
+
+def remember_thumbnail(user_id, kind, thumb):
+    """Cache a finished render and return True; Pending/blocked ones return False.
+
+    Callers must not cache the outer lookup on False, or the missing avatar
+    would stick in ROBLOX_USER_CACHE and the render would never be retried.
+    """
+    if thumb.get("state") == "Completed" and thumb.get("imageUrl"):
+        with ROBLOX_THUMBNAIL_CACHE_LOCK:
+            ROBLOX_THUMBNAIL_CACHE[(user_id, kind)] = thumb["imageUrl"]
+        return True
+    return False
+
+
+def fetch_roblox_user_data(input_value):
     try:
         # If input is all digits, treat as user ID
         if input_value.isdigit():
             user_id = int(input_value)
         else:
             # Look up the ID from the username
-            user_lookup_url = "https://users.roblox.com/v1/usernames/users"
-            response = requests.post(
-                user_lookup_url,
-                json={"usernames": [input_value], "excludeBannedUsers": False}
+            response = ROBLOX_SESSION.post(
+                ROBLOX_USERNAMES_URL,
+                json={"usernames": [input_value], "excludeBannedUsers": False},
+                timeout=REQUEST_TIMEOUT,
             )
 
             if response.status_code != 200:
-                print("Failed to get user ID")
-                return None
+                logger.warning("Failed to get user ID")
+                return None, False
 
             data = response.json()
             if not data.get("data"):
-                print("Username not found")
-                return None
+                logger.debug("Username not found")
+                return None, False
 
             user_id = data["data"][0]["id"]
 
-        # Fetch profile info
-        profile_response = requests.get(f"https://users.roblox.com/v1/users/{user_id}")
+        # Fetch profile info and avatar thumbnail concurrently
+        profile_future = HTTP_EXECUTOR.submit(
+            ROBLOX_SESSION.get, ROBLOX_PROFILE_URL(user_id), timeout=REQUEST_TIMEOUT
+        )
+        avatar_url = cached_thumbnails(user_id, ("avatar",))["avatar"]
+        thumbnail_future = None
+        if avatar_url is None:
+            thumbnail_future = HTTP_EXECUTOR.submit(
+                ROBLOX_SESSION.get,
+                ROBLOX_AVATAR_URL(user_id),
+                timeout=REQUEST_TIMEOUT,
+            )
+
+        profile_response = profile_future.result()
         if profile_response.status_code != 200:
-            print("Failed to fetch profile info")
-            return None
+            logger.warning("Failed to fetch profile info")
+            return None, False
 
         profile = profile_response.json()
 
-        # Fetch avatar thumbnail
-        thumbnail_response = requests.get(
-            f"https://thumbnails.roblox.com/v1/users/avatar?userIds={user_id}&size=420x420&format=Png&isCircular=false"
-        )
-        thumbnail_data = thumbnail_response.json()
-        avatar_url = ""
-        if thumbnail_data.get("data") and len(thumbnail_data["data"]) > 0:
-            avatar_url = thumbnail_data["data"][0].get("imageUrl", "")
+        # A throttled or still-rendering avatar is shown as "" but not cached
+        complete = True
+        if thumbnail_future is not None:
+            thumbnail_response = thumbnail_future.result()
+            thumbnail_data = thumbnail_response.json() if thumbnail_response.status_code == 200 else {}
+            avatar_url = ""
+            complete = False
+            if thumbnail_data.get("data") and len(thumbnail_data["data"]) > 0:
+                complete = remember_thumbnail(user_id, "avatar", thumbnail_data["data"][0])
+                if complete:
+                    avatar_url = thumbnail_data["data"][0]["imageUrl"]
 
         created_str = profile.get("created")
         created_date = parse_roblox_date(created_str)
         if created_date:
-            account_age = (datetime.now(timezone.utc) - created_date).days
+            now = datetime.now(UTC)
+            account_age = (now - created_date).days
         else:
             account_age = "-"
 
@@ -346,11 +634,103 @@ def get_roblox_user_data(input_value):
             "voiceChat": "No active Logic",
             "safeChat": "No active Logic",
             "language": "No active Logic",
-        }
+        }, complete
 
+    except requests.exceptions.Timeout:
+        raise  # surfaced as a 504 by upstream_timeout()
     except Exception as e:
-        print(f"Exception occurred: {e}")
-        return None
+        logger.error("Exception occurred: %s", e)
+        return None, False
+
+
+def fetch_roblox_lookup_data(username):
+    # Step 1: Get user ID
+    res = ROBLOX_SESSION.post(
+        ROBLOX_USERNAMES_URL,
+        json={"usernames": [username]},
+        headers={"Content-Type": "application/json"},
+        timeout=REQUEST_TIMEOUT,
+    )
+
+    body = res.json() if res.status_code == 200 else None
+    if not body or not body.get("data"):
+        return None, False
+
+    user = body["data"][0]
+    user_id = user["id"]
+
+    # Steps 2-4 only depend on the user ID, so fetch them concurrently
+    acc_future = HTTP_EXECUTOR.submit(
+        ROBLOX_SESSION.get, ROBLOX_PROFILE_URL(user_id), timeout=REQUEST_TIMEOUT
+    )
+    friends_future = HTTP_EXECUTOR.submit(
+        ROBLOX_SESSION.get,
+        ROBLOX_FRIENDS_COUNT_URL(user_id),
+        timeout=REQUEST_TIMEOUT,
+    )
+    # Both thumbnail sizes come back from a single batch call, unless cached
+    thumbs = cached_thumbnails(user_id, ("headshot", "bust"))
+    thumbs_future = None
+    if None in thumbs.values():
+        thumbs_future = HTTP_EXECUTOR.submit(
+            ROBLOX_SESSION.post,
+            ROBLOX_THUMBNAIL_BATCH_URL,
+            json=[
+                {"requestId": "headshot", "type": "AvatarHeadShot", "targetId": user_id,
+                 "size": "150x150", "format": "Png", "isCircular": True},
+                {"requestId": "bust", "type": "AvatarBust", "targetId": user_id,
+                 "size": "420x420", "format": "Png", "isCircular": False},
+            ],
+            timeout=REQUEST_TIMEOUT,
+        )
+
+    # Step 2: Get account info. A throttled or failed sub-request still fills
+    # the card with placeholders, but leaves complete False so it isn't cached.
+    acc_response = acc_future.result()
+    complete = acc_response.status_code == 200
+    acc_info = acc_response.json() if complete else {}
+    created_at = acc_info.get("created")
+
+    # Calculate account age safely
+    created_date = parse_roblox_date(created_at)
+    now = datetime.now(UTC)
+    if created_date is None:
+        account_age_days = "N/A"
+    else:
+        account_age_days = (now - created_date).days
+
+    # Step 3: Get friends count
+    friends_response = friends_future.result()
+    complete = complete and friends_response.status_code == 200
+    friends_data = friends_response.json() if friends_response.status_code == 200 else {}
+    friends_count = friends_data.get("count", "N/A")
+
+    # Step 4: Get avatar image URLs
+    if thumbs_future is not None:
+        thumbs_response = thumbs_future.result()
+        complete = complete and thumbs_response.status_code == 200
+        thumbs_body = thumbs_response.json() if thumbs_response.status_code == 200 else {}
+        for thumb in thumbs_body.get("data") or []:
+            kind = thumb.get("requestId")
+            if kind in thumbs and thumbs[kind] is None and remember_thumbnail(user_id, kind, thumb):
+                thumbs[kind] = thumb["imageUrl"]
+        # Any size still missing was Pending/blocked or absent from the batch
+        complete = complete and None not in thumbs.values()
+    avatar_url = thumbs["headshot"]
+    avatar_bust_url = thumbs["bust"]
+
+    return {
+        "name": user["name"],
+        "accountAge": account_age_days,
+        "friends": friends_count,
+        "followers": "N/A",  # Add logic if needed
+        "following": "N/A",  # Add logic if needed
+        "voiceChat": "Not Eligible",  # Add voiceChat API if needed
+        "safeChat": "Disabled",  # Add logic if needed
+        "language": "en-us",
+        "avatarUrl": avatar_url,
+        "avatarBustUrl": avatar_bust_url,
+    }, complete
 
 
 @app.route("/details", methods=["GET"])
@@ -359,7 +739,14 @@ def details():
     if not input_value:
         return render_template("details.html", error="No username or ID provided")
 
-    user_data = get_roblox_user_data(input_value)
+    try:
+        user_data = get_roblox_user_data(input_value)
+    except InvalidRobloxInput:
+        return render_template("details.html", error="Invalid Roblox username or ID", username=input_value), 400
+    except requests.exceptions.Timeout:
+        # This is an HTML page, so don't fall through to the JSON upstream_timeout()
+        logger.warning("⏱️ Roblox timed out loading details for %s", input_value)
+        return render_template("details.html", error="Roblox took too long to respond", username=input_value), 504
 
     if not user_data:
         return render_template("details.html", error="Failed to load user data", username=input_value)
@@ -381,37 +768,44 @@ def permissions():
 
 @app.route("/api/chatlogs", methods=["POST"])
 def add_chatlog():
-    data = request.get_json()
+    try:
+        data = orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError:
+        return jsonify({"error": "Invalid JSON"}), 400
 
-    required_fields = ["username", "message", "timestamp"]
-    if not all(field in data for field in required_fields):
+    if not isinstance(data, dict) or CHATLOG_REQUIRED_FIELDS - data.keys():
         return jsonify({"error": "Missing required fields"}), 400
 
-    logs = load_chatlogs()
-    logs.append({
-        "username": data["username"],
-        "userId": data.get("userId", None),
-        "message": data["message"],
-        "timestamp": data["timestamp"],
-        "session_id": session_id  # Add session ID here
-    })
-    save_chatlogs(logs)
+    get_chatlog_db().execute(
+        "INSERT INTO chatlogs (username, username_lc, user_id, message, timestamp, session_id) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        chatlog_row(
+            data["username"],
+            data.get("userId", None),
+            data["message"],
+            data["timestamp"],
+            session_id,  # Add session ID here
+        ),
+    )
 
     return jsonify({"success": True, "session_id": session_id}), 200
 
 @app.route("/api/chatlogs", methods=["GET"])
 def get_chatlogs():
     username = request.args.get("username")
-    logs = load_chatlogs()
+    conn = get_chatlog_db()
 
     if username:
-        # Filter logs to only those that match the username (case-insensitive)
-        filtered_logs = [log for log in logs if log.get("username", "").lower() == username.lower()]
-        return jsonify(filtered_logs), 200
+        # Only logs that match the username (case-insensitive), via the index
+        rows = conn.execute(
+            "SELECT * FROM chatlogs WHERE username_lc = ? ORDER BY id", (username.lower(),)
+        )
+        return Response(iter_chatlogs_json(rows), status=200, mimetype="application/json")
 
     # If no username provided, return all logs (or maybe you want to restrict this)
-    return jsonify(logs), 200
-
+    rows = conn.execute("SELECT * FROM chatlogs ORDER BY id")
+    return Response(iter_chatlogs_json(rows), status=200, mimetype="application/json")
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    # Local development only; production runs under gunicorn (see procfile)
+    app.run(debug=DEBUG, threaded=True)
\ No newline at end of file